@@ -1,15 +1,32 @@
 # app.py
-import json, os, threading, time, random
-from flask import Flask, request, jsonify, send_from_directory
+import json, math, os, threading, time, random, logging
+from dataclasses import dataclass
+from flask import Flask, request, jsonify
 from pathlib import Path
+from werkzeug.middleware.shared_data import SharedDataMiddleware
 
 from device.handy import HandyClient
 from haptics.runner import StoryRunner
 from haptics.tokens import TokenCompiler
 from haptics.motifs import MotifLibrary
 
+# Timestamps come from the handler, so device logging never formats times itself.
+# No-op when an entry point (e.g. run_sedusa.py) has already configured logging.
+logging.basicConfig(format="[%(asctime)s] %(message)s", datefmt="%H:%M:%S", level=logging.INFO)
+
 APP_ROOT = Path(__file__).parent.resolve()
-app = Flask(__name__, static_folder=str(APP_ROOT / "web"), static_url_path="")
+WEB_DIR = str(APP_ROOT / "web")
+ASSETS_DIR = str(APP_ROOT / "web" / "assets")
+# Asset URLs are not versioned, so keep the cache short: after an hour browsers revalidate
+# (SharedDataMiddleware answers with ETag/Last-Modified and 304s), picking up images changed by an update.
+ASSETS_MAX_AGE_S = 3600
+
+app = Flask(__name__, static_folder=WEB_DIR, static_url_path="")
+# /status is polled continuously; skip key sorting and always emit compact JSON.
+app.json.sort_keys = False
+app.json.compact = True
+# Serve images straight from the WSGI layer, ahead of Flask's routing and request context.
+app.wsgi_app = SharedDataMiddleware(app.wsgi_app, {"/assets": ASSETS_DIR}, cache_timeout=ASSETS_MAX_AGE_S)
 
 # ---------- Config ----------
 def load_config():
@@ -34,15 +51,58 @@ def load_narrative_content():
     """Loads the main dialogue file at startup."""
     content_path = APP_ROOT / "content" / "lines_medusa.json"
     try:
-        with open(content_path, "r", encoding="utf-8") as f:
-            print(f"[Content] Successfully loaded narrative from {content_path}")
-            return json.load(f)
+        # json.loads accepts the raw UTF-8 bytes directly, skipping the text-mode decode layer.
+        content = json.loads(content_path.read_bytes())
+        print(f"[Content] Successfully loaded narrative from {content_path}")
+        return content
     except FileNotFoundError:
         print(f"FATAL: Could not load narrative file from {content_path}")
         return {}
 
 NARRATIVE_CONTENT = load_narrative_content()
 
+# ---------- Request Schema ----------
+def _clamp(x: float, lo: float, hi: float) -> float:
+    """Clamps x into [lo, hi]; lo wins if the bounds cross, and NaN falls to lo."""
+    if x > hi:
+        x = hi
+    return x if x >= lo else lo
+
+def _finite(value) -> float:
+    """float(value), rejecting NaN and infinities with ValueError so they never reach the caps."""
+    x = float(value)
+    if not math.isfinite(x):
+        raise ValueError(f"non-finite value: {value!r}")
+    return x
+
+@dataclass
+class StartParams:
+    """Story parameters accepted by /start, already coerced to their types."""
+    depth_min: float
+    depth_max: float
+    speed_min: float
+    speed_max: float
+    length_min: int = 10
+    name: str = ""
+    seed: int | None = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "StartParams":
+        """
+        Validates a decoded request body. Raises TypeError/ValueError on missing or invalid fields,
+        OverflowError on infinite integers (JSON's Infinity parses as a float).
+        """
+        seed = data.get("seed")
+        return cls(
+            depth_min=_finite(data.get("depth_min")),
+            depth_max=_finite(data.get("depth_max")),
+            speed_min=_finite(data.get("speed_min")),
+            speed_max=_finite(data.get("speed_max")),
+            length_min=int(data.get("length_min", 10)),
+            name=(data.get("name") or "").strip()[:24],
+            seed=int(seed) if seed is not None else None,
+        )
+
 # ---------- Haptics + Story Engine ----------
 motif_library = MotifLibrary([
     APP_ROOT / "data" / "motif_bank.json",
@@ -52,8 +112,10 @@ compiler = TokenCompiler(motif_library)
 
 runner_lock = threading.Lock()
 runner: StoryRunner | None = None
+# Last snapshot served by /status; returned as-is while a control command holds runner_lock.
+_last_snapshot: dict = {"state": "idle"}
 
-def build_runner(params, api_key: str | None):
+def build_runner(params: StartParams, api_key: str | None):
     global runner
     with runner_lock:
         if runner:
@@ -61,6 +123,7 @@ def build_runner(params, api_key: str | None):
             if runner.is_alive():
                 runner.stop()
                 runner.join(timeout=1.0)
+            runner.device.close()
 
         # Create the device object first, using the key provided by the client.
         device = HandyClient(
@@ -76,13 +139,13 @@ def build_runner(params, api_key: str | None):
             device=device,
             compiler=compiler,
             narrative_templates=NARRATIVE_CONTENT,
-            depth_min_mm=params["depth_min"],
-            depth_max_mm=params["depth_max"],
-            speed_min_hz=params["speed_min"],
-            speed_max_hz=params["speed_max"],
-            length_min=params["length_min"],
-            name=params.get("name") or "",
-            seed=params.get("seed")
+            depth_min_mm=params.depth_min,
+            depth_max_mm=params.depth_max,
+            speed_min_hz=params.speed_min,
+            speed_max_hz=params.speed_max,
+            length_min=params.length_min,
+            name=params.name,
+            seed=params.seed
         )
         runner.start()
         return runner
@@ -92,10 +155,6 @@ def build_runner(params, api_key: str | None):
 def root():
     return app.send_static_file("index.html")
 
-@app.route("/assets/<path:filename>")
-def assets(filename):
-    return send_from_directory(str(APP_ROOT / "web" / "assets"), filename)
-
 @app.post("/start")
 def start_story():
     data = request.get_json(force=True, silent=True) or {}
@@ -104,59 +163,53 @@ def start_story():
         return jsonify({"ok": False, "error": "API key is required"}), 400
 
     try:
-        depth_min = float(data.get("depth_min"))
-        depth_max = float(data.get("depth_max"))
-        speed_min = float(data.get("speed_min"))
-        speed_max = float(data.get("speed_max"))
-        length_min = int(data.get("length_min", 10))
-    except (TypeError, ValueError):
+        params = StartParams.from_json(data)
+    except (TypeError, ValueError, OverflowError):
         return jsonify({"ok": False, "error": "Missing or invalid parameters"}), 400
     
     caps = CONFIG["caps"]
-    depth_min = max(caps["depth_min_mm"], min(depth_min, caps["depth_max_mm"]))
-    depth_max = max(depth_min, min(depth_max, caps["depth_max_mm"]))
-    speed_min = max(caps["speed_min_hz"], min(speed_min, caps["speed_max_hz"]))
-    speed_max = max(speed_min, min(speed_max, caps["speed_max_hz"]))
-
-    params = {
-        "depth_min": depth_min,
-        "depth_max": depth_max,
-        "speed_min": speed_min,
-        "speed_max": speed_max,
-        "length_min": length_min,
-        "name": (data.get("name") or "").strip()[:24],
-        "seed": data.get("seed")
-    }
+    params.depth_min = _clamp(params.depth_min, caps["depth_min_mm"], caps["depth_max_mm"])
+    params.depth_max = _clamp(params.depth_max, params.depth_min, caps["depth_max_mm"])
+    params.speed_min = _clamp(params.speed_min, caps["speed_min_hz"], caps["speed_max_hz"])
+    params.speed_max = _clamp(params.speed_max, params.speed_min, caps["speed_max_hz"])
     
     r = build_runner(params, api_key)
     return jsonify({"ok": True, "state": r.state_snapshot()})
 
+# Control commands are queued to the runner thread, so these handlers never take runner_lock.
 @app.post("/pause")
 def pause_story():
-    with runner_lock:
-        if runner: runner.pause()
+    if runner: runner.send("pause")
     return jsonify({"ok": True})
 
 @app.post("/resume")
 def resume_story():
-    with runner_lock:
-        if runner: runner.resume()
+    if runner: runner.send("resume")
     return jsonify({"ok": True})
 
 @app.post("/stop")
 def stop_story():
-    with runner_lock:
-        if runner:
-            runner.stop()
-            runner.join(timeout=1.0)
+    if runner: runner.send("stop")
     return jsonify({"ok": True})
 
 @app.get("/status")
 def status():
-    with runner_lock:
-        if not runner:
-            return jsonify({"state": "idle"})
-        return jsonify(runner.state_snapshot())
+    global _last_snapshot
+    # Never queue a status poll behind start/stop; serve the previous snapshot instead.
+    if not runner_lock.acquire(blocking=False):
+        return jsonify(_last_snapshot)
+    try:
+        _last_snapshot = runner.state_snapshot() if runner else {"state": "idle"}
+    finally:
+        runner_lock.release()
+    return jsonify(_last_snapshot)
 
 if __name__ == "__main__":
-    app.run(host=CONFIG["server"]["host"], port=CONFIG["server"]["port"], debug=False, threaded=True)
\ No newline at end of file
+    # Console runs echo every device command; embedders (e.g. run_sedusa.py's log file) keep them at DEBUG.
+    if CONFIG["device"].get("log_device", True):
+        logging.getLogger("device.handy").setLevel(logging.DEBUG)
+    from waitress import serve
+    host, port = CONFIG["server"]["host"], CONFIG["server"]["port"]
+    print(f"[Server] Running on http://127.0.0.1:{port} (listening on {host})")
+    # One process with a fixed thread pool: the runner is a process-global singleton behind runner_lock.
+    serve(app, host=host, port=port, threads=8)
\ No newline at end of file
@@ -1,7 +1,22 @@
 # device/handy.py
 from __future__ import annotations
-import threading, requests, time, sys
-from typing import Optional, Tuple
+import threading, queue, requests, time, json, logging
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+_EMPTY: dict = {}  # Shared empty body for PUTs without a payload; never mutated.
+_CLOSE = object()  # Queue sentinel that tells the writer thread to exit.
+_encode = json.JSONEncoder(separators=(",", ":"), allow_nan=False).encode
+
+@lru_cache(maxsize=256)
+def _encode_body(items: Tuple[Tuple[str, Any], ...]) -> bytes:
+    """JSON-encodes a PUT body given as sorted items; repeated bodies hit the cache."""
+    return _encode(dict(items)).encode("utf-8")
 
 class HandyAPIError(RuntimeError):
     pass
@@ -12,6 +27,9 @@ class HandyClient:
     Communicates with the Handy v2 API.
     """
     FULL_TRAVEL_MM = 110.0 # Device's maximum physical travel distance in mm.
+    FLUSH_INTERVAL_S = 0.05 # Writer cadence: at most one slide/velocity PUT per endpoint per tick.
+    BREAKER_THRESHOLD = 3 # Consecutive failed PUTs before the circuit opens.
+    BREAKER_COOLDOWN_S = 2.0 # While open, commands are skipped instead of waiting out timeouts.
 
     def __init__(
         self,
@@ -30,50 +48,163 @@ class HandyClient:
         self.max_speed_hz = max_speed_hz
         self.speed_calibration_factor = speed_calibration_factor
 
-        self._slide_window: Optional[Tuple[float, float]] = None
-        self._speed_hz: Optional[float] = None
-        self._lock = threading.Lock()
+        # Reciprocals so the per-command conversions multiply instead of divide.
+        self._pct_per_mm = 100.0 / self.FULL_TRAVEL_MM
+        self._inv_calib = 1.0 / speed_calibration_factor
+
+        # Built once; _put runs for every device command.
+        self._url_base = self.base_url.rstrip("/")
+        self._headers = {
+            "Content-Type": "application/json",
+            "X-Connection-Key": self.api_key,
+        }
+
+        # One keep-alive session per client so consecutive commands reuse the TLS connection.
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=4,
+            # Retry only failed connects: a PUT that reached the device but timed out is a
+            # breaker failure, not three 5 s waits in a row ahead of e.g. hamp/stop.
+            max_retries=Retry(total=2, connect=2, read=0, other=0, backoff_factor=0.1),
+        )
+        self._session.mount("https://", adapter)
+
+        # Latest requested slide window / speed; the writer samples these every flush tick.
+        # Producers only assign single keys (atomic under the GIL), so no lock is needed:
+        # a flush that races an update just picks it up on the next tick.
+        self._pending: Dict[str, Any] = {}
+        self._sent: Dict[str, dict] = {}  # Last body sent per endpoint.
+
+        # Circuit breaker state, only touched by the writer thread.
+        self._fail_count = 0
+        self._open_until = 0.0
 
         if self.mode == "handy" and not self.api_key:
             raise ValueError("In mode='handy', api_key must be provided.")
 
+        # Commands are sent by a writer thread so the runner never waits on HTTP.
+        self._cmd_q: queue.Queue = queue.Queue()
+        # One-shot commands taken off _cmd_q but not yet sent; only touched by the writer thread.
+        self._backlog: Deque[Tuple[str, dict | None]] = deque()
+        self._writer = threading.Thread(target=self._io_loop, daemon=True)
+        self._writer.start()
+
     def _put(self, path: str, body: dict | None = None) -> None:
-        """Sends a PUT request to the Handy API."""
+        """Queues a one-shot PUT request (mode/start/stop) for the writer thread."""
+        self._cmd_q.put((path, body))
+
+    def _io_loop(self) -> None:
+        """
+        Every FLUSH_INTERVAL_S, sends queued one-shot commands in order, then at
+        most one slide and one velocity PUT for the latest requested state.
+        """
+        while True:
+            time.sleep(self.FLUSH_INTERVAL_S)
+            closing = False
+            while True:
+                try:
+                    item = self._cmd_q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _CLOSE:
+                    closing = True
+                    break
+                self._backlog.append(item)
+            self._send_backlog()
+
+            window = self._pending.get("slide")
+            hz = self._pending.get("velocity")
+            # A value that cannot be encoded must not kill the writer: log it and drop it
+            # (unless a producer already replaced it) so it is not retried every tick.
+            if window is not None:
+                try:
+                    self._send_changed("slide", self._slide_body(window))
+                except Exception:
+                    logger.exception("[HANDY ERROR] Invalid slide window %s", window)
+                    if self._pending.get("slide") is window: self._pending.pop("slide", None)
+                    window = None
+            if window is not None and hz is not None:
+                try:
+                    self._send_changed("hamp/velocity", self._velocity_body(window, hz))
+                except Exception:
+                    logger.exception("[HANDY ERROR] Invalid speed %s Hz", hz)
+                    if self._pending.get("velocity") is hz: self._pending.pop("velocity", None)
+
+            if closing:
+                if self._backlog:
+                    # Last chance for e.g. hamp/stop: wait out an open circuit once before giving up.
+                    time.sleep(max(0.0, self._open_until - time.monotonic()))
+                    self._send_backlog()
+                self._session.close()
+                return
+
+    def _send_backlog(self) -> None:
+        """
+        Sends pending one-shot commands in order. While the circuit is open they stay queued
+        instead of being dropped, so mode/start/stop still reach the device after the cooldown.
+        """
+        while self._backlog:
+            if time.monotonic() < self._open_until:
+                return
+            self._send_safe(*self._backlog.popleft())
+
+    def _send_changed(self, path: str, body: dict) -> None:
+        if self._sent.get(path) == body:
+            return
+        # Only remember delivered bodies so a failed or skipped update is retried next tick.
+        if self._send_safe(path, body):
+            self._sent[path] = body
+
+    def _send_safe(self, path: str, body: dict | None = None) -> bool:
+        """Sends without raising: the writer thread must survive any failure, or later commands are never sent."""
+        try:
+            return self._send(path, body)
+        except HandyAPIError as e:
+            logger.error("[HANDY ERROR] %s", e)
+            return False
+        except Exception:
+            logger.exception("[HANDY ERROR] Unexpected failure on PUT /%s", path)
+            return False
+
+    def _send(self, path: str, body: dict | None = None) -> bool:
+        """Sends a PUT request to the Handy API. Returns False if the open circuit skipped it."""
         if self.mode == "simulate":
             if self.log:
-                t = time.strftime("%H:%M:%S")
-                print(f"[{t}] [HANDY SIM] PUT /{path} {body or {}}")
-            return
+                logger.debug("[HANDY SIM] PUT /%s %s", path, body or _EMPTY)
+            return True
 
         if not self.api_key:
-            print("[HANDY WARNING] No key set, command ignored.", file=sys.stderr)
-            return
+            logger.warning("[HANDY WARNING] No key set, command ignored.")
+            return True
 
-        url = self.base_url.rstrip("/") + "/" + path
-        headers = {
-            "Content-Type": "application/json",
-            "X-Connection-Key": self.api_key,
-        }
+        if time.monotonic() < self._open_until:
+            return False
+
+        url = f"{self._url_base}/{path}"
+        body = body or _EMPTY
         try:
             if self.log:
-                t = time.strftime("%H:%M:%S")
-                print(f"[{t}] PUT {url} {body or {}}")
-            r = requests.put(url, headers=headers, json=body or {}, timeout=self.timeout)
+                logger.debug("PUT %s %s", url, body)
+            # Content-Type is already set on the session, so send pre-encoded bytes.
+            data = _encode_body(tuple(sorted(body.items())))
+            r = self._session.put(url, data=data, timeout=self.timeout)
             r.raise_for_status()
         except requests.RequestException as e:
+            self._fail_count += 1
+            if self._fail_count >= self.BREAKER_THRESHOLD:
+                self._open_until = time.monotonic() + self.BREAKER_COOLDOWN_S
             raise HandyAPIError(f"Handy API error on PUT /{path}: {e}") from e
+        self._fail_count = 0
+        return True
+
+    def _slide_body(self, window: Tuple[float, float]) -> dict:
+        min_mm, max_mm = window
 
-    # ---------- public interface runner.py calls ----------
-    def set_slide_window(self, min_mm: float, max_mm: float) -> None:
-        with self._lock:
-            win = (round(min_mm, 1), round(max_mm, 1))
-            if win == self._slide_window:
-                return
-            self._slide_window = win
-        
         # Convert mm values to percentages.
-        min_pct = (min_mm / self.FULL_TRAVEL_MM) * 100
-        max_pct = (max_mm / self.FULL_TRAVEL_MM) * 100
+        min_pct = min_mm * self._pct_per_mm
+        max_pct = max_mm * self._pct_per_mm
 
         # INVERT coordinate system for the API (0 is deep, 100 is shallow).
         api_min = max(0, round(100 - max_pct))
@@ -83,33 +214,37 @@ class HandyClient:
         if api_min >= api_max:
             api_max = min(100, api_min + 2)
 
-        self._put("slide", {"min": api_min, "max": api_max})
-
-    def set_speed_hz(self, hz: float) -> None:
-        with self._lock:
-            if hz == self._speed_hz:
-                return
-            self._speed_hz = hz
-
-        if not self._slide_window:
-            return  # Wait for slide window to be set first.
+        return {"min": api_min, "max": api_max}
 
+    def _velocity_body(self, window: Tuple[float, float], hz: float) -> dict:
         # CORRECTED FORMULA: This formula correctly ties frequency (Hz) to stroke length
         # to produce a physically consistent velocity, while the calibration factor
         # tunes the final result to feel correct on the Handy's 0-100 scale.
-        window_mm = self._slide_window[1] - self._slide_window[0]
-        window_pct = (window_mm / self.FULL_TRAVEL_MM) * 100
+        window_mm = window[1] - window[0]
+        window_pct = window_mm * self._pct_per_mm
         
         raw_velocity = window_pct * hz
         
         # Apply calibration factor to tune the perceived speed.
-        velocity = int(raw_velocity / self.speed_calibration_factor)
+        velocity = int(raw_velocity * self._inv_calib)
 
-        self._put("hamp/velocity", {"velocity": max(0, min(100, velocity))})
+        return {"velocity": velocity if 0 <= velocity <= 100 else (0 if velocity < 0 else 100)}
+
+    # ---------- public interface runner.py calls ----------
+    def set_slide_window(self, min_mm: float, max_mm: float) -> None:
+        self._pending["slide"] = (round(min_mm, 1), round(max_mm, 1))
+
+    def set_speed_hz(self, hz: float) -> None:
+        # Velocity is only sent once a slide window exists to derive it from.
+        self._pending["velocity"] = hz
 
     def start_motion(self) -> None:
         self._put("mode", {"mode": 1})  # Set to HAMP mode.
         self._put("hamp/start")
 
     def stop_motion(self) -> None:
-        self._put("hamp/stop")
\ No newline at end of file
+        self._put("hamp/stop")
+
+    def close(self) -> None:
+        """Stops the writer thread after its next flush, then releases the pooled connections."""
+        self._cmd_q.put(_CLOSE)
\ No newline at end of file
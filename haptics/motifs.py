@@ -1,8 +1,20 @@
 # haptics/motifs.py
 from __future__ import annotations
-import json
+import json, sys
 from pathlib import Path
-from typing import List, Dict, Any
+from types import MappingProxyType
+from typing import List, Any, Callable, Mapping
+
+def _freeze(obj: Any) -> Any:
+    """
+    Recursively makes decoded JSON read-only: dicts become MappingProxyType views (with
+    interned keys, so banks share one str per key name) and lists become tuples.
+    """
+    if isinstance(obj, dict):
+        return MappingProxyType({sys.intern(k): _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
 
 class MotifLibrary:
     """
@@ -10,29 +22,49 @@ class MotifLibrary:
     Provides a simple lookup by pattern name.
     """
     def __init__(self, bank_paths: List[Path]):
-        self.motifs_by_name: Dict[str, Dict[str, Any]] = {}
-        self._load(bank_paths)
+        self._bank_paths = list(bank_paths)
+        # Read-only view of the loaded banks; a reload publishes a new view instead of mutating this one.
+        self.motifs_by_name: Mapping[str, Mapping[str, Any]] = MappingProxyType({})
+        self._reload_listeners: List[Callable[[], None]] = []
+        self._load(self._bank_paths)
 
     def _load(self, bank_paths: List[Path]):
-        """Loads all patterns from the given list of file paths."""
-        all_motifs = []
-        for path in bank_paths:
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        all_motifs.extend(data)
-            except FileNotFoundError:
-                print(f"[MotifLibrary] Warning: Bank file not found at {path}")
-            except json.JSONDecodeError:
-                print(f"[MotifLibrary] Warning: Could not decode JSON from {path}")
-
-        for motif in all_motifs:
-            if 'name' in motif:
-                self.motifs_by_name[motif['name']] = motif
-        
+        """Loads all patterns from the given list of file paths, frozen all the way down."""
+        live = {
+            sys.intern(motif['name']): _freeze(motif)
+            for path in bank_paths
+            for motif in self._read(path)
+            if isinstance(motif, dict) and 'name' in motif
+        }
+        # Publish by reference assignment (atomic under the GIL): readers see the old or the new map, never a mix.
+        self.motifs_by_name = MappingProxyType(live)
+        # Shadow the method with the map's own bound .get: same result, one Python frame less per lookup.
+        self.get_pattern = self.motifs_by_name.get
         print(f"[MotifLibrary] Loaded {len(self.motifs_by_name)} total motifs.")
 
-    def get_pattern(self, name: str) -> Dict[str, Any] | None:
+    def add_reload_listener(self, callback: Callable[[], None]) -> None:
+        """Registers a callback run after every reload, e.g. to drop anything compiled from the old patterns."""
+        self._reload_listeners.append(callback)
+
+    def reload(self) -> None:
+        """Re-reads the bank files and swaps in the new patterns without locking readers."""
+        self._load(self._bank_paths)
+        for callback in self._reload_listeners:
+            callback()
+
+    @staticmethod
+    def _read(path: Path) -> List[Any]:
+        """Returns the list of motifs in one bank file, or [] if it is missing or invalid."""
+        try:
+            data = json.loads(Path(path).read_bytes())
+        except FileNotFoundError:
+            print(f"[MotifLibrary] Warning: Bank file not found at {path}")
+            return []
+        except json.JSONDecodeError:
+            print(f"[MotifLibrary] Warning: Could not decode JSON from {path}")
+            return []
+        return data if isinstance(data, list) else []
+
+    def get_pattern(self, name: str) -> Mapping[str, Any] | None:
         """Retrieves a pattern by its unique name."""
         return self.motifs_by_name.get(name)
\ No newline at end of file
@@ -1,13 +1,14 @@
 # haptics/runner.py
-import threading, time, random, json
-from typing import Optional, Dict, Any, List
-from dataclasses import dataclass, asdict
+import threading, queue, heapq, bisect, itertools, time, random, json, sys, os
+from typing import Optional, Dict, Any, List, Tuple
+from dataclasses import dataclass
 from pathlib import Path
-from haptics.tokens import TokenCompiler
+from haptics.tokens import TokenCompiler, Event
 from device.handy import HandyClient
 
 @dataclass
 class StoryState:
+    """Shape of StoryRunner.state_snapshot(); kept as documentation of the /status payload."""
     state: str
     started_at: float
     ends_at: float
@@ -18,10 +19,16 @@ class StoryState:
 
 class StoryRunner(threading.Thread):
     TICK_S = 0.06
+    TICK_NS = 60_000_000  # TICK_S in integer nanoseconds, for the playback clock.
     JITTER_FACTOR = 0.20 # General jitter for speed and range
     PLAYLIST_OVERLAP = 0.4 # Overlap between patterns in playlist
     BURST_PULSE_JITTER_MS = 30 # Max +/- ms jitter for on/off times
     FORCED_NARRATIVE_INTERVAL_S = 18 # Time in seconds to force a new narrative line if none occurred
+    # Act name -> (act key, narrative template key) for every act a story can reach.
+    _ACT_KEY = {
+        f"The {name}": (name.upper(), f"STORY_{name.upper()}")
+        for name in ("Trap", "Revelation", "Test", "Interrogation", "Worship", "Gaze", "Claiming", "Release")
+    }
 
     def __init__(self, device: HandyClient, compiler: TokenCompiler,
                  narrative_templates: Dict, depth_min_mm: float, depth_max_mm: float,
@@ -40,11 +47,27 @@ class StoryRunner(threading.Thread):
         self.seed = seed if seed is not None else random.randint(1000, 999999)
         self._stop_event = threading.Event()
         self._pause = threading.Event()
+        # Control commands from HTTP handlers; only this thread consumes them.
+        self.cmd_q: queue.SimpleQueue = queue.SimpleQueue()
         self.started_at = time.time()
         self.ends_at = self.started_at + self.length_min * 60
         self.last_line = ""
-        self.last_narrative_line_time = 0.0 # Single cooldown for all narrative
-        self.act = 'The Trap'
+        self._next_narrative_ns = 0 # time.monotonic_ns() after which a line is forced; set by _announce.
+        self._set_act('The Trap')
+        # Pattern name -> (compiled events, total duration in s). Cached events are shared; never mutate them.
+        self._compiled_cache: Dict[str, Tuple[List[Event], float]] = {}
+        # Last values handed to the device, so unchanged ticks skip the call entirely.
+        self._last_win: Tuple[Optional[float], Optional[float]] = (None, None)
+        self._last_hz: Optional[float] = None
+        # (id(seg), is_on) of the last burst write; bursts only write on a phase edge or segment change.
+        self._burst_edge: Optional[Tuple[int, bool]] = None
+        # Band geometry only depends on the depth range, so _band_to_window just looks it up.
+        third = max(8.0, depth_max_mm - depth_min_mm) / 3.0
+        self._band_centers = {'A': depth_min_mm + third * 0.5, 'B': depth_min_mm + third * 1.5, 'C': depth_min_mm + third * 2.5}
+        self._max_range_mm = third * 0.9
+        # Seeded separately from story selection so jitter is reproducible per seed too.
+        self._jitter_rng = random.Random(f"{self.seed}:jitter")
+        self._jitter_n = 0
 
     def stop(self):
         self._stop_event.set()
@@ -61,19 +84,147 @@ class StoryRunner(threading.Thread):
     def resume(self):
         self._pause.clear()
 
+    def send(self, cmd: str):
+        """
+        Queues 'pause', 'resume' or 'stop' for the runner thread to apply on its
+        next tick. Once the thread has exited the command is applied directly.
+        """
+        if cmd == "stop":
+            # Thread-safe on its own, and must not be lost if run() has just finished its last drain.
+            self._stop_event.set()
+        if self.is_alive():
+            self.cmd_q.put_nowait(cmd)
+        else:
+            self._apply(cmd)
+
+    def _apply(self, cmd: str):
+        if cmd == "pause": self.pause()
+        elif cmd == "resume": self.resume()
+        elif cmd == "stop": self.stop()
+
+    def _drain_commands(self):
+        while True:
+            try:
+                cmd = self.cmd_q.get_nowait()
+            except queue.Empty:
+                return
+            self._apply(cmd)
+
+    def _wait(self, seconds: float):
+        """Sleeps in ticks so queued commands are still applied while waiting."""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self._drain_commands()
+            if self._stop_event.is_set(): return
+            time.sleep(self.TICK_S)
+
+    def _set_act(self, act: str):
+        """Sets the current act and caches its narrative key/pool for the per-tick check."""
+        self.act = act
+        keys = self._ACT_KEY.get(act)
+        if keys is None:
+            act_key = act.replace("The ", "").upper()
+            keys = (act_key, f"STORY_{act_key}")
+        self._current_act_key, self._current_narrative_key = keys
+        self._current_narrative_pool = self.narrative_templates.get(self._current_narrative_key)
+
+    def _compiled(self, name: str) -> Tuple[List[Event], float]:
+        """Compiles a pattern once per story and remembers its total duration."""
+        hit = self._compiled_cache.get(name)
+        if hit is None:
+            events = self.compiler.compile_by_name(name)
+            hit = self._compiled_cache[name] = (events, self._total_duration(events))
+        return hit
+
+    @staticmethod
+    def _total_duration(events: List[Dict]) -> float:
+        return max((e.offset_s + e.duration_s for e in events), default=0)
+
     def state_snapshot(self) -> Dict[str, Any]:
+        """Returns the StoryState fields as a plain dict (cheaper than asdict's deep copy; polled by /status)."""
         now = time.time()
         rem = max(0, int((self.ends_at - now) * 1000))
-        return asdict(StoryState(
-            state=('paused' if self._pause.is_set() else ('running' if not self._stop_event.is_set() else 'stopped')),
-            started_at=self.started_at, ends_at=self.ends_at,
-            t_remaining_ms=rem, last_line=self.last_line,
-            act=self.act, seed=self.seed
-        ))
+        return {
+            "state": ('paused' if self._pause.is_set() else ('running' if not self._stop_event.is_set() else 'stopped')),
+            "started_at": self.started_at, "ends_at": self.ends_at,
+            "t_remaining_ms": rem, "last_line": self.last_line,
+            "act": self.act, "seed": self.seed,
+        }
+
+    @staticmethod
+    def _raise_priority():
+        """
+        Best-effort real-time scheduling for the calling (runner) thread so ticks are not
+        preempted by ordinary work. Silently keeps the default policy where not permitted.
+        If CPU_ISOLATION names a core index, the thread is also pinned to that core.
+        """
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), 15) # THREAD_PRIORITY_TIME_CRITICAL
+            return
+        try:
+            # pid 0 is the calling thread on Linux.
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(20))
+        except (AttributeError, OSError):
+            pass # Not Linux, or no CAP_SYS_NICE / RLIMIT_RTPRIO.
+        core = os.environ.get("CPU_ISOLATION")
+        if core:
+            try:
+                os.sched_setaffinity(0, {int(core)})
+            except (AttributeError, ValueError, OSError):
+                pass
 
     def run(self):
-        rng = random.Random(self.seed)
+        self._raise_priority()
+        # Windows sleeps in ~15.6 ms quanta by default; ask for 1 ms timer resolution while a story plays.
+        winmm = None
+        if sys.platform == "win32":
+            import ctypes
+            winmm = ctypes.windll.winmm
+            winmm.timeBeginPeriod(1)
+        try:
+            self._run_story()
+        finally:
+            self._drain_commands()
+            if winmm:
+                winmm.timeEndPeriod(1)
+
+    def _run_story(self):
+        # The whole story is decided up front from the seed; playback below only dispatches it.
+        plan = self._build_playlist(random.Random(self.seed))
 
+        for act_name, steps in plan:
+            if self._should_stop(): break
+            self._set_act(act_name)
+            
+            # Announce act start. These are always narrative updates and reset the timer.
+            if self._current_act_key == "TRAP":
+                 self._announce("INVITE") # The Trap still starts with an Invite
+            else:
+                self._announce(self._current_narrative_key)
+
+            for events, starts, total, apply_jitter, wait_after_s in steps:
+                self._play_events(events, total, apply_jitter, starts)
+                if self._should_stop(): break
+                if wait_after_s: self._wait(wait_after_s)
+
+        if self._should_stop(): return
+        self._set_act("The Release")
+        self._announce(self._current_narrative_key)
+        release = self.compiler.release_phase
+        self._play_events(release, self._total_duration(release))
+        self._wait(10)
+        self.device.stop_motion()
+        self._announce("OUTRO")
+
+    def _build_playlist(self, rng: random.Random) -> List[Tuple[str, List[Tuple[List[Event], Optional[List[float]], float, bool, float]]]]:
+        """
+        Builds every act's playback steps before anything touches the device. Each act is
+        (act_name, [(events, starts, total_duration_s, apply_jitter, wait_after_s), ...]), where
+        starts holds each event's absolute offset (None: use its own offset_s). The seeded
+        rng is consumed in the same order as during playback, so a seed yields the same story.
+        """
         # Dynamically build the story timeline based on the session length
         act_defs = []
         if self.length_min >= 60:
@@ -96,27 +247,39 @@ class StoryRunner(threading.Thread):
 
         all_pattern_names = list(self.compiler.motifs.motifs_by_name.keys())
 
-        for act_name, act_duration in act_timeline:
-            if self._should_stop(): break
-            self.act = act_name
-            
-            # Announce act start. These are always narrative updates and reset the timer.
-            key_name = act_name.replace("The ", "").upper()
-            if key_name == "TRAP":
-                 self._announce("INVITE") # The Trap still starts with an Invite
-            else:
-                self._announce(f"STORY_{key_name}")
+        # name -> (dp, rng, band) for every motif with a pattern, read once instead of per candidate per pick.
+        motif_meta = {}
+        for n in all_pattern_names:
+            motif = self.compiler.motifs.get_pattern(n)
+            if motif and 'pattern' in motif:
+                p = motif['pattern']
+                dp = p.get('dp', 50)
+                motif_meta[n] = (dp, p.get('rng', 20), self.compiler._dp_to_band(dp))
 
-            if self.act == "The Gaze":
-                self._play_events(self.compiler.compile_by_name("snake_freeze"))
-                if self._should_stop(): break
-                time.sleep(rng.uniform(4.0, 6.0))
-                events = self.compiler.compile_by_name("snake_pass")
-                self._play_events(events, apply_jitter=False)
+        # Picks only advance the playlist for patterns longer than 0.1 s; without one, an act could never fill.
+        can_fill = any(self._compiled(n)[1] > 0.1 for n in all_pattern_names)
+
+        plan = []
+        for act_name, act_duration in act_timeline:
+            if act_name == "The Gaze":
+                freeze_events, freeze_total = self._compiled("snake_freeze")
+                gaze_wait_s = rng.uniform(4.0, 6.0)
+                pass_events, pass_total = self._compiled("snake_pass")
+                plan.append((act_name, [
+                    (freeze_events, None, freeze_total, True, gaze_wait_s),
+                    (pass_events, None, pass_total, False, 0.0),
+                ]))
+                continue
+            if not can_fill:
+                plan.append((act_name, []))
                 continue
 
+            # Compiled events are shared with the compile cache, so the playlist references
+            # them unchanged and keeps each one's shifted start in a parallel list.
             act_playlist = []
+            act_starts = []
             playlist_duration_s = 0.0
+            playlist_end_s = 0.0
             last_pattern_info = {"name": None, "dp": None, "rng": None, "band": None}
 
             while playlist_duration_s < act_duration and not self._should_stop():
@@ -124,21 +287,13 @@ class StoryRunner(threading.Thread):
                 
                 pattern_name = None
                 if last_pattern_info["name"]:
-                    candidate_patterns = []
-                    for p_name_candidate in eligible_patterns:
-                        motif_candidate = self.compiler.motifs.get_pattern(p_name_candidate)
-                        if not motif_candidate or 'pattern' not in motif_candidate: continue
-                        
-                        p_data_candidate = motif_candidate['pattern']
-                        current_dp = p_data_candidate.get('dp', 50)
-                        current_band = self.compiler._dp_to_band(current_dp)
-
-                        if last_pattern_info["band"] and current_band != last_pattern_info["band"]:
-                            candidate_patterns.append(p_name_candidate)
-                        elif last_pattern_info["dp"] is not None and abs(current_dp - last_pattern_info["dp"]) > 30:
-                            candidate_patterns.append(p_name_candidate)
-                        elif p_name_candidate != last_pattern_info["name"]:
-                            candidate_patterns.append(p_name_candidate)
+                    last_name, last_dp, last_band = last_pattern_info["name"], last_pattern_info["dp"], last_pattern_info["band"]
+                    candidate_patterns = [
+                        n for n, (dp, _, band) in motif_meta.items()
+                        if (last_band and band != last_band)
+                        or (last_dp is not None and abs(dp - last_dp) > 30)
+                        or n != last_name
+                    ]
                     
                     if candidate_patterns:
                         pattern_name = rng.choice(candidate_patterns)
@@ -147,43 +302,31 @@ class StoryRunner(threading.Thread):
                 else:
                     pattern_name = rng.choice(eligible_patterns)
 
-                if pattern_name is None:
-                    time.sleep(self.TICK_S)
-                    continue
+                if pattern_name is None: continue
 
-                new_events = self.compiler.compile_by_name(pattern_name)
+                new_events, pattern_duration = self._compiled(pattern_name)
                 if not new_events: continue
 
-                motif = self.compiler.motifs.get_pattern(pattern_name)
-                if not motif or 'pattern' not in motif:
+                meta = motif_meta.get(pattern_name)
+                if meta is None:
                     last_pattern_info["dp"], last_pattern_info["rng"], last_pattern_info["band"] = 50, 20, 'B'
                 else:
                     first_seg = new_events[0]
-                    pattern_dp = first_seg.get('dp', motif['pattern'].get('dp', 50))
+                    pattern_dp = first_seg.dp if first_seg.dp is not None else meta[0]
                     last_pattern_info["dp"] = pattern_dp
-                    last_pattern_info["rng"] = first_seg.get('range_mm', motif['pattern'].get('rng', 20))
+                    last_pattern_info["rng"] = first_seg.range_mm
                     last_pattern_info["band"] = self.compiler._dp_to_band(pattern_dp)
                 last_pattern_info["name"] = pattern_name
 
-                pattern_duration = max(e.get('offset_s', 0) + e.get('duration_s', 0) for e in new_events) if new_events else 0
                 if pattern_duration <= 0.1: continue
 
-                for event in new_events:
-                    evt_copy = event.copy()
-                    evt_copy['offset_s'] += playlist_duration_s
-                    act_playlist.append(evt_copy)
+                act_playlist.extend(new_events)
+                act_starts.extend([e.offset_s + playlist_duration_s for e in new_events])
+                playlist_end_s = max(playlist_end_s, playlist_duration_s + pattern_duration)
                 playlist_duration_s += pattern_duration * (1.0 - self.PLAYLIST_OVERLAP)
             
-            if act_playlist and not self._should_stop():
-                self._play_events(act_playlist)
-
-        if self._should_stop(): return
-        self.act = "The Release"
-        self._announce("STORY_RELEASE")
-        self._play_events(self.compiler.release_phase())
-        time.sleep(10)
-        self.device.stop_motion()
-        self._announce("OUTRO")
+            plan.append((act_name, [(act_playlist, act_starts, playlist_end_s, True, 0.0)] if act_playlist else []))
+        return plan
 
     def _announce(self, key: str):
         lines = self.narrative_templates.get(key)
@@ -194,7 +337,7 @@ class StoryRunner(threading.Thread):
                 self.last_line = full_line_with_meta[:bracket_pos].strip()
             else:
                 self.last_line = full_line_with_meta
-            self.last_narrative_line_time = time.time()
+            self._next_narrative_ns = time.monotonic_ns() + self.FORCED_NARRATIVE_INTERVAL_S * 1_000_000_000
         else:
             self.last_line = f"Narrative key not found: {key}"
             
@@ -202,102 +345,174 @@ class StoryRunner(threading.Thread):
         normalized_speed = min(1.0, max(0.0, base_hz / 3.0))
         return self.speed_min + (self.speed_max - self.speed_min) * normalized_speed
 
-    def _play_default(self, seg: Dict[str, Any], apply_jitter: bool):
-        hz = seg.get('hz', seg.get('sp', 50) / 100 * 3.0)
-        mm = seg.get('range_mm', seg.get('rng', 20))
+    def _write_window(self, lo: float, hi: float):
+        last_lo, last_hi = self._last_win
+        if last_lo is not None and abs(lo - last_lo) < 0.5 and abs(hi - last_hi) < 0.5:
+            return  # Sub-0.5 mm changes are below what the device resolves.
+        self._last_win = (lo, hi)
+        self.device.set_slide_window(lo, hi)
+
+    def _write_hz(self, hz: float):
+        hz = round(hz, 2)  # Keeps the float comparison stable.
+        if self._last_hz is not None and abs(hz - self._last_hz) < 0.01:
+            return
+        self._last_hz = hz
+        self.device.set_speed_hz(hz)
+
+    def _build_jitter(self, n_ticks: int):
+        """Pre-draws every random jitter value a playback of n_ticks ticks can use; helpers index by tick."""
+        r = self._jitter_rng
+        jf, jms = self.JITTER_FACTOR, self.BURST_PULSE_JITTER_MS
+        self._jitter_n = n_ticks
+        self._jitter_hz = [r.uniform(1.0 - jf, 1.0 + jf) for _ in range(n_ticks)]
+        self._jitter_mm = [r.uniform(1.0 - jf, 1.0 + jf) for _ in range(n_ticks)]
+        self._stop_roll = [r.random() < 0.05 for _ in range(n_ticks)]
+        self._jitter_on_ms = [r.uniform(-jms, jms) for _ in range(n_ticks)]
+        self._jitter_off_ms = [r.uniform(-jms, jms) for _ in range(n_ticks)]
+
+    def _play_default(self, seg: Event, apply_jitter: bool, tick: int):
+        hz = seg.hz
+        mm = seg.range_mm
         
         if apply_jitter:
-            hz *= random.uniform(1.0 - self.JITTER_FACTOR, 1.0 + self.JITTER_FACTOR)
-            mm *= random.uniform(1.0 - self.JITTER_FACTOR, 1.0 + self.JITTER_FACTOR)
-            if seg.get('type') in ['sine', 'triangle', 'hold'] and random.random() < 0.05:
+            j = tick % self._jitter_n
+            hz *= self._jitter_hz[j]
+            mm *= self._jitter_mm[j]
+            if seg.type in ('sine', 'triangle', 'hold') and self._stop_roll[j]:
                 hz = 0
                 
         scaled_hz = self._get_scaled_hz(hz)
-        self.device.set_slide_window(*self._band_to_window(seg['band'], mm))
-        self.device.set_speed_hz(scaled_hz)
-
-    def _play_burst(self, seg: Dict[str, Any], elapsed_in_seg: float):
-        jitter_ms_on = random.uniform(-self.BURST_PULSE_JITTER_MS, self.BURST_PULSE_JITTER_MS)
-        jitter_ms_off = random.uniform(-self.BURST_PULSE_JITTER_MS, self.BURST_PULSE_JITTER_MS)
-        on_ms = max(50, (seg.get('burst_on_ms', 200) + jitter_ms_on)) / 1000.0
-        off_ms = max(50, (seg.get('burst_off_ms', 200) + jitter_ms_off)) / 1000.0
+        self._write_window(*self._band_to_window(seg.band, mm))
+        self._write_hz(scaled_hz)
+
+    def _play_burst(self, seg: Event, elapsed_in_seg: float, tick: int):
+        j = tick % self._jitter_n
+        jitter_ms_on = self._jitter_on_ms[j]
+        jitter_ms_off = self._jitter_off_ms[j]
+        on_ms = max(50, (seg.burst_on_ms + jitter_ms_on)) / 1000.0
+        off_ms = max(50, (seg.burst_off_ms + jitter_ms_off)) / 1000.0
         cycle_dur = on_ms + off_ms
-        if cycle_dur == 0: return self._play_default(seg, True)
+        if cycle_dur == 0: return self._play_default(seg, True, tick)
         phase = elapsed_in_seg % cycle_dur
         is_on = phase < on_ms
-        hz = seg.get('hz', seg.get('sp', 70) / 100 * 3.0) if is_on else 0
-        scaled_hz = self._get_scaled_hz(hz)
-        self.device.set_slide_window(*self._band_to_window(seg['band'], seg.get('range_mm', seg.get('rng', 30))))
-        self.device.set_speed_hz(scaled_hz)
-
-    def _play_pulse(self, seg: Dict[str, Any], elapsed_in_seg: float):
-        cycles = seg.get('cycles', 4)
-        cycle_dur_base = seg['duration_s'] / cycles if cycles > 0 else seg['duration_s']
-        jitter_ms_cycle = random.uniform(-self.BURST_PULSE_JITTER_MS, self.BURST_PULSE_JITTER_MS)
-        cycle_dur = max(0.1, cycle_dur_base + (jitter_ms_cycle / 1000.0))
-        phase = (elapsed_in_seg % cycle_dur) / cycle_dur
-        sp1, sp2 = seg.get('sp', 40), seg.get('sp2', 80)
-        hz = (seg.get('hz', (sp1 if phase < 0.5 else sp2) / 100 * 3.0))
+        edge = (id(seg), is_on)
+        if edge == self._burst_edge: return  # Same segment, same phase: the device already has these values.
+        self._burst_edge = edge
+        hz = seg.hz if is_on else 0
         scaled_hz = self._get_scaled_hz(hz)
-        self.device.set_slide_window(*self._band_to_window(seg['band'], seg.get('range_mm', seg.get('rng', 25))))
-        self.device.set_speed_hz(scaled_hz)
+        self._write_window(*self._band_to_window(seg.band, seg.range_mm))
+        self._write_hz(scaled_hz)
 
-    def _play_events(self, events: List[Dict], apply_jitter: bool = True):
+    def _play_pulse(self, seg: Event):
+        # Compiled events always carry hz, so pulses play at it steadily, without jitter.
+        scaled_hz = self._get_scaled_hz(seg.hz)
+        self._write_window(*self._band_to_window(seg.band, seg.range_mm))
+        self._write_hz(scaled_hz)
+
+    def _play_events(self, events: List[Event], total_duration: float, apply_jitter: bool = True,
+                     starts: Optional[List[float]] = None):
+        """
+        Plays events for total_duration seconds (the latest start + duration_s, precomputed by the caller).
+        starts, if given, overrides each event's offset_s so playlists can reuse compiled events as-is.
+        """
         if not events or self._should_stop(): return
         self.device.start_motion()
-        start_t = time.time()
-        total_duration = max(e.get('offset_s', 0) + e.get('duration_s', 0) for e in events) if events else 0
-        end_t = start_t + total_duration
+        self._burst_edge = None
+        # Playback time is kept in integer monotonic nanoseconds; seconds are only derived for the pattern helpers.
+        start_ns = time.monotonic_ns()
+        end_ns = start_ns + round(total_duration * 1e9)
+        tick = 0
+        self._build_jitter(int(total_duration / self.TICK_S) + 16)
+
+        # Sweep line over events sorted by start: `cursor` is the next event to start,
+        # `live` is a min-heap of (end, index) for events that have started and not yet ended.
+        if starts is None:
+            starts = [e.offset_s for e in events]
+        order = sorted(range(len(events)), key=starts.__getitem__)
+        events = [events[i] for i in order]
+        starts = [round(starts[i] * 1e9) for i in order]
+        ends = [start + round(e.duration_s * 1e9) for start, e in zip(starts, events)]
+        cursor = 0
+        live: List[Tuple[int, int]] = []
+        # Active indices and their selection weights, rebuilt only when an event starts or ends.
+        active: List[int] = []
+        cum_weights: Optional[List[float]] = None
+        membership_changed = False
         
-        while time.time() < end_t:
+        while True:
+            now_ns = time.monotonic_ns()
+            if now_ns >= end_ns: break
+            self._drain_commands()
             if self._should_stop(): break
             if self._pause.is_set():
-                time.sleep(self.TICK_S); continue
+                tick = self._sleep_to_next_tick(start_ns, tick); continue
             
-            now = time.time()
-            if now - self.last_narrative_line_time > self.FORCED_NARRATIVE_INTERVAL_S:
-                current_act_key = self.act.replace("The ", "").upper()
-                if self.narrative_templates.get(f"STORY_{current_act_key}"):
-                    self._announce(f"STORY_{current_act_key}")
-
-            now_off = time.time() - start_t
-            active = [e for e in events if e['offset_s'] <= now_off < e['offset_s'] + e['duration_s']]
+            if now_ns > self._next_narrative_ns and self._current_narrative_pool:
+                self._announce(self._current_narrative_key)
+
+            now_off = now_ns - start_ns
+            # Binary search for the events that started since the last tick, instead of testing one by one.
+            started = bisect.bisect_right(starts, now_off, cursor)
+            if started != cursor:
+                for i in range(cursor, started):
+                    heapq.heappush(live, (ends[i], i))
+                cursor = started
+                membership_changed = True
+            while live and live[0][0] <= now_off:
+                heapq.heappop(live)
+                membership_changed = True
+            if membership_changed:
+                # Indices rather than events: a shared compiled event can appear at several starts.
+                active = sorted(i for _, i in live)
+                cum_weights = self._selection_weights(events, active)
+                membership_changed = False
             
             if active:
-                seg = None
-                dominant_band = next((s.get('dominant_band') for s in active if 'dominant_band' in s), None)
-                
-                if dominant_band:
-                    dominant_segs = [s for s in active if s['band'] == dominant_band]
-                    other_segs = [s for s in active if s['band'] != dominant_band]
-                    if random.random() < 0.8 and dominant_segs:
-                        seg = random.choice(dominant_segs)
-                    elif other_segs:
-                        seg = random.choice(other_segs)
-                    else:
-                        seg = random.choice(dominant_segs) # Fallback
+                idx = random.choices(active, cum_weights=cum_weights)[0]
+                seg = events[idx]
+                pattern_type = seg.type
+                if pattern_type == 'burst': self._play_burst(seg, (now_off - starts[idx]) * 1e-9, tick)
                 else:
-                    seg = random.choice(active)
-
-                pattern_type = seg.get('type', 'sine')
-                elapsed_in_seg = now_off - seg['offset_s']
-                if pattern_type == 'burst': self._play_burst(seg, elapsed_in_seg)
-                elif pattern_type == 'pulse': self._play_pulse(seg, elapsed_in_seg)
-                else: self._play_default(seg, apply_jitter)
+                    self._burst_edge = None
+                    if pattern_type == 'pulse': self._play_pulse(seg)
+                    else: self._play_default(seg, apply_jitter, tick)
             else:
-                 self.device.set_speed_hz(0)
+                self._burst_edge = None
+                self._write_hz(0)
 
-            time.sleep(self.TICK_S)
+            tick = self._sleep_to_next_tick(start_ns, tick)
+
+    @staticmethod
+    def _selection_weights(events: List[Event], active: List[int]) -> Optional[List[float]]:
+        """
+        Cumulative weights for picking among the active events: when the first active event naming a
+        dominant_band has both in-band and out-of-band company, in-band events share 80% of the picks
+        and the rest share 20%. Returns None (uniform) otherwise.
+        """
+        dominant_band = next((events[i].dominant_band for i in active if events[i].dominant_band), None)
+        if not dominant_band:
+            return None
+        n_dominant = sum(1 for i in active if events[i].band == dominant_band)
+        n_other = len(active) - n_dominant
+        if not n_dominant or not n_other:
+            return None
+        w_dominant, w_other = 0.8 / n_dominant, 0.2 / n_other
+        return list(itertools.accumulate(w_dominant if events[i].band == dominant_band else w_other for i in active))
+
+    def _sleep_to_next_tick(self, start_ns: int, tick: int) -> int:
+        """
+        Sleeps until the next tick boundary start_ns + k*TICK_NS, so work done inside a
+        tick does not accumulate as drift. Ticks already missed are skipped, not replayed.
+        """
+        now_ns = time.monotonic_ns()
+        tick = max(tick + 1, (now_ns - start_ns) // self.TICK_NS + 1)
+        time.sleep(max(0, start_ns + tick * self.TICK_NS - now_ns) * 1e-9)
+        return tick
 
     def _band_to_window(self, band: str, rng_mm: float) -> tuple[float, float]:
-        lo, hi = self.depth_min, self.depth_max
-        span = max(8.0, hi - lo)
-        third = span / 3.0
-        if band == 'A': center = lo + third * 0.5
-        elif band == 'B': center = lo + third * 1.5
-        else: center = lo + third * 2.5
-        half = max(4.0, min(rng_mm, third * 0.9)) / 2.0
-        return (max(lo, center - half), min(hi, center + half))
+        center = self._band_centers.get(band, self._band_centers['C'])
+        half = max(4.0, min(rng_mm, self._max_range_mm)) / 2.0
+        return (max(self.depth_min, center - half), min(self.depth_max, center + half))
 
     def _should_stop(self) -> bool:
         return self._stop_event.is_set() or time.time() >= self.ends_at
\ No newline at end of file
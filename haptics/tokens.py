@@ -1,52 +1,122 @@
 # haptics/tokens.py
 import random
-from typing import List, Dict
+from typing import List, Dict, NamedTuple, Optional, Sequence, Tuple
 from haptics.motifs import MotifLibrary
 
+_EMPTY: dict = {}  # Stand-in for a motif without tags; never mutated.
+
+# Band for each integer depth percentage 0-100: A below 33, B below 66, C from 66.
+_DP_BAND = tuple('A' * 33 + 'B' * 33 + 'C' * 35)
+
+def _band_for(dp) -> str:
+    """Maps a depth percentage to its band via _DP_BAND; fractions truncate, out-of-range clamps."""
+    dp = int(dp)
+    return _DP_BAND[dp] if 0 <= dp <= 100 else _DP_BAND[0 if dp < 0 else 100]
+
+class Event(NamedTuple):
+    """
+    One timed segment of a compiled pattern, with exactly the fields the StoryRunner reads.
+    Defaults are the ones the runner applies when a bank entry leaves a field out.
+    """
+    band: str
+    hz: float
+    range_mm: float
+    offset_s: float
+    duration_s: float
+    dominant_band: Optional[str] = None
+    type: Optional[str] = None
+    dp: Optional[int] = None
+    burst_on_ms: float = 200
+    burst_off_ms: float = 200
+
+# Compiled result for a name with no usable pattern: one second of stillness. Shared, never rebuilt.
+_SILENT_FALLBACK: Tuple[Event, ...] = (Event(band='B', hz=0.0, range_mm=0, offset_s=0, duration_s=1.0),)
+
 class TokenCompiler:
     """
     Fetches patterns from a MotifLibrary and converts them into timed,
     overlapping haptic events for the StoryRunner.
     """
+    # Story-beat shortcuts: attribute -> pattern name. Each attribute holds that pattern's
+    # shared, immutable compiled events, refreshed whenever the banks reload.
+    _SHORTCUTS = {
+        'coil_invite': 'snake_coil',
+        'braid3_block': 'snake_braid3',
+        'braid_with_pass': 'snake_pass',
+        'staggered_pairs': 'snake_staggered',
+        'freeze_beat': 'snake_freeze',
+        'release_phase': 'wave_train_progressive',
+    }
+    coil_invite: Tuple[Event, ...]
+    braid3_block: Tuple[Event, ...]
+    braid_with_pass: Tuple[Event, ...]
+    staggered_pairs: Tuple[Event, ...]
+    freeze_beat: Tuple[Event, ...]
+    release_phase: Tuple[Event, ...]
+
     def __init__(self, motif_library: MotifLibrary):
         self.motifs = motif_library
+        # (name, overlap) -> compiled events. Patterns only change when the library reloads.
+        self._cache: Dict[Tuple[str, float], Tuple[Event, ...]] = {}
+        self._warned_missing: set = set()  # Names already reported as missing; kept across reloads.
+        self._precompile()
+        motif_library.add_reload_listener(self.clear_cache)
+
+    def _precompile(self) -> None:
+        for attr, name in self._SHORTCUTS.items():
+            setattr(self, attr, self._compile_cached_ro(name))
+
+    def clear_cache(self) -> None:
+        """Drops all compiled events and recompiles the shortcut attributes; called by the MotifLibrary after a reload."""
+        self._cache = {}
+        self._precompile()
 
     def _dp_to_band(self, dp: int) -> str:
         """Maps a depth percentage (0-100) to a band ('A', 'B', 'C')."""
-        if dp < 33: return 'A'
-        if dp < 66: return 'B'
-        return 'C'
+        return _band_for(dp)
 
-    def compile_by_name(self, name: str, overlap: float = 0.3) -> List[Dict]:
+    def compile_by_name(self, name: str, overlap: float = 0.3) -> List[Event]:
         """
         Looks up a pattern by name and converts it into a list of
         timed events. It now also injects special tags like 'dominant_band'.
+        The list is a fresh copy callers may modify; the events themselves are immutable.
         """
+        return list(self._compile_cached_ro(name, overlap))
+
+    def _compile_cached_ro(self, name: str, overlap: float = 0.3) -> Tuple[Event, ...]:
+        """Like compile_by_name, but returns the cached, fully immutable tuple itself with no copy."""
+        key = (name, overlap)
+        events = self._cache.get(key)
+        if events is None:
+            events = self._cache[key] = tuple(self._compile(name, overlap))
+        return events
+
+    def _compile(self, name: str, overlap: float) -> Sequence[Event]:
         motif = self.motifs.get_pattern(name)
         if not motif or 'pattern' not in motif:
-            return [{'band': 'B', 'hz': 0, 'range_mm': 0, 'offset_s': 0, 'duration_s': 1}]
+            if name not in self._warned_missing:
+                self._warned_missing.add(name)
+                print(f"[TokenCompiler] Warning: No pattern named '{name}', playing a silent fallback.")
+            return _SILENT_FALLBACK
 
         p = motif['pattern']
-        tags = motif.get("tags", {})
-        dominant_band = tags.get("dominant_band")
-
-        # Base properties for all segments from this pattern
-        base_props = {}
-        if dominant_band:
-            base_props['dominant_band'] = dominant_band
+        # Tag shared by all segments from this pattern
+        dominant_band = (motif.get("tags") or _EMPTY).get("dominant_band") or None
 
         # Handle single-segment patterns
         if p.get('type') != 'combo' or not p.get('combo'):
-            event = {
-                'band': self._dp_to_band(p.get('dp', 50)),
-                'hz': p.get('sp', 50) / 100 * 3.0,
-                'range_mm': p.get('rng', 20),
-                'offset_s': 0,
-                'duration_s': p.get('duration_ms', 5000) / 1000.0,
-                **p,
-                **base_props
-            }
-            return [event]
+            return [Event(
+                band=_band_for(p.get('dp', 50)),
+                hz=p.get('sp', 50) / 100 * 3.0,
+                range_mm=p.get('rng', 20),
+                offset_s=0,
+                duration_s=p.get('duration_ms', 5000) / 1000.0,
+                dominant_band=dominant_band,
+                type=p.get('type'),
+                dp=p.get('dp'),
+                burst_on_ms=p.get('burst_on_ms', 200),
+                burst_off_ms=p.get('burst_off_ms', 200),
+            )]
 
         combo = p['combo']
         total_d = p.get('duration_ms', 5000) / 1000.0
@@ -55,36 +125,22 @@ class TokenCompiler:
         band_dur = total_d / (band_count - overlap * (band_count - 1)) if band_count > 1 else total_d
         step = band_dur * (1 - overlap)
         
+        # Pattern-level fallbacks are the same for every segment, so look them up once.
+        p_dp, p_sp, p_rng = p.get('dp', 50), p.get('sp', 50), p.get('rng', 20)
+        p_dur_default = band_dur * 1000
         events = []
+        append = events.append
         for idx, seg in enumerate(combo):
-            offset = idx * step
-            event = {
-                'band': self._dp_to_band(seg.get('dp', p.get('dp', 50))),
-                'hz': seg.get('sp', p.get('sp', 50)) / 100 * 3.0,
-                'range_mm': seg.get('rng', p.get('rng', 20)),
-                'offset_s': offset,
-                'duration_s': seg.get('duration_ms', band_dur * 1000) / 1000.0,
-                **seg,
-                **base_props
-            }
-            events.append(event)
+            append(Event(
+                band=_band_for(seg.get('dp', p_dp)),
+                hz=seg.get('sp', p_sp) / 100 * 3.0,
+                range_mm=seg.get('rng', p_rng),
+                offset_s=idx * step,
+                duration_s=seg.get('duration_ms', p_dur_default) / 1000.0,
+                dominant_band=dominant_band,
+                type=seg.get('type'),
+                dp=seg.get('dp'),
+                burst_on_ms=seg.get('burst_on_ms', 200),
+                burst_off_ms=seg.get('burst_off_ms', 200),
+            ))
         return events
-
-    # --- Shortcut methods for specific story beats ---
-    def coil_invite(self, *args, **kwargs) -> List[Dict]:
-        return self.compile_by_name("snake_coil")
-
-    def braid3_block(self, *args, **kwargs) -> List[Dict]:
-        return self.compile_by_name("snake_braid3")
-
-    def braid_with_pass(self, *args, **kwargs) -> List[Dict]:
-        return self.compile_by_name("snake_pass")
-
-    def staggered_pairs(self, *args, **kwargs) -> List[Dict]:
-        return self.compile_by_name("snake_staggered")
-
-    def freeze_beat(self, *args, **kwargs) -> List[Dict]:
-        return self.compile_by_name("snake_freeze")
-    
-    def release_phase(self, *args, **kwargs) -> List[Dict]:
-        return self.compile_by_name("wave_train_progressive")
\ No newline at end of file
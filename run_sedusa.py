@@ -1,4 +1,4 @@
-import os, sys, time, threading, webbrowser, logging
+import os, sys, time, threading, logging
 from pathlib import Path
 
 # ---- logging to file in user profile ----
@@ -17,40 +17,46 @@ else:
     base_dir = Path(__file__).parent.resolve()
 os.chdir(base_dir)
 
-# ---- import your Flask app ----
-try:
-    from app import app  # if your app is a module-level Flask() named 'app'
-except Exception:
-    # fallback if you expose a factory
-    from app import create_app
-    app = create_app()
-
 PORT = 5423  # fixed local port for simplicity
 
-def _open_browser_when_ready():
-    url = f"http://127.0.0.1:{PORT}"
-    # try /status first if it exists, else just open after a short delay
-    try_status = True
+def _load_app():
+    # production mode regardless of the user's environment (FLASK_ENV is gone since Flask 2.3)
+    os.environ["FLASK_DEBUG"] = "0"
     try:
-        import requests  # already in your requirements
+        from app import app  # if your app is a module-level Flask() named 'app'
     except Exception:
-        try_status = False
+        # fallback if you expose a factory
+        from app import create_app
+        app = create_app()
+    return app
 
-    if try_status:
-        for _ in range(50):
-            try:
-                requests.get(f"{url}/status", timeout=0.4)
+def _open_browser_when_ready():
+    url = f"http://127.0.0.1:{PORT}"
+    # the server is ready once it accepts TCP connections; no HTTP round trip needed
+    import socket, webbrowser
+    for _ in range(50):
+        try:
+            with socket.create_connection(("127.0.0.1", PORT), timeout=0.2):
                 break
-            except Exception:
-                time.sleep(0.2)
-    else:
-        time.sleep(1.0)
+        except OSError:
+            time.sleep(0.1)
     try:
         webbrowser.open(url)
     except Exception as e:
         logging.error("Failed to open browser: %r", e)
 
 if __name__ == "__main__":
+    import socket
+    # bind only to localhost so no firewall prompts.
+    # Listen before importing the app: the browser's first request waits in the
+    # accept backlog while the app loads, instead of polling for the port.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if sys.platform != "win32":  # same as waitress: on Windows this would let others share the port
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", PORT))
+    sock.listen(128)
     threading.Thread(target=_open_browser_when_ready, daemon=True).start()
-    # bind only to localhost so no firewall prompts
-    app.run(host="127.0.0.1", port=PORT, debug=False, use_reloader=False, threaded=True)
+
+    app = _load_app()
+    from waitress import serve
+    serve(app, sockets=[sock], threads=8, channel_timeout=30)